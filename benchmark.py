@@ -0,0 +1,139 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import time
+from asyncio import StreamReader, StreamWriter
+
+from config import ENCODING, REQUEST_END, SOURCE_DIR_PATH
+from service.control_server import CONTROL_SERVER_CONF
+from service.data_reader import read_data_with_timeout
+
+BENCHMARK_REQUEST = 'ОТДОВАЙ Иван Иванов РКСОК/1.0\r\n\r\n'
+CONFIGURATIONS = {'default': '0', 'tuned': '1'}
+CONTROL_SERVER_STUB_RESPONSE = f'{CONTROL_SERVER_CONF.responses.yes} {CONTROL_SERVER_CONF.protocol}{REQUEST_END}'
+
+
+async def _permit_request(reader: StreamReader, writer: StreamWriter) -> None:
+    """Callback of the control server stub, permits every request."""
+    try:
+        await read_data_with_timeout(reader=reader)
+        writer.write(CONTROL_SERVER_STUB_RESPONSE.encode(encoding=ENCODING))
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+def run_control_server_stub(host: str, port: int) -> None:
+    """Runs local control server which permits every request, so the benchmark does not measure the network."""
+    async def serve() -> None:
+        server = await asyncio.start_server(_permit_request, host=host, port=port, backlog=1024)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+async def _send_request(host: str, port: int, request: bytes) -> float | None:
+    """Sends request and reads response until the server closes connection, returns latency or None on error."""
+    started_at = time.perf_counter()
+    try:
+        reader, writer = await asyncio.open_connection(host=host, port=port)
+        writer.write(request)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+    except OSError:
+        return None
+    return time.perf_counter() - started_at if response else None
+
+
+async def run_load(host: str, port: int, concurrency: int, requests_count: int) -> str:
+    """Sends requests_count requests keeping concurrency requests in flight, returns report row."""
+    request = BENCHMARK_REQUEST.encode(encoding=ENCODING)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send_limited() -> float | None:
+        async with semaphore:
+            return await _send_request(host=host, port=port, request=request)
+
+    started_at = time.perf_counter()
+    results = await asyncio.gather(*(send_limited() for _ in range(requests_count)))
+    duration = time.perf_counter() - started_at
+
+    latencies = sorted(latency * 1000 for latency in results if latency is not None)
+    errors = requests_count - len(latencies)
+    if len(latencies) < 2:
+        return f'{concurrency:>11} | {"-":>8} | {"-":>8} | {"-":>8} | {errors:>6}'
+    percentiles = statistics.quantiles(latencies, n=100, method='inclusive')
+    return (
+        f'{concurrency:>11} | {len(latencies) / duration:>8.1f} | {percentiles[49]:>8.2f} | '
+        f'{percentiles[98]:>8.2f} | {errors:>6}'
+    )
+
+
+async def wait_for_server(host: str, port: int, timeout: float) -> None:
+    """Waits until the server accepts connections, the server warms up its dependencies before listening."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host=host, port=port)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f'Server on {host}:{port} did not start in {timeout} seconds')
+            await asyncio.sleep(0.2)
+        else:
+            writer.close()
+            return
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Compares RKSOK server throughput and latency with default and tuned runtime configurations. '
+                    'The server keeps records in memory and asks local control server stub, '
+                    'so only the runtime layer differs.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--control-server-port', type=int, default=8001)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50, 100, 500])
+    parser.add_argument('--requests', type=int, default=2000, help='number of requests per concurrency level')
+    parser.add_argument('--start-timeout', type=float, default=60, help='server start timeout, seconds')
+    args = parser.parse_args()
+
+    control_server_stub = multiprocessing.Process(
+        target=run_control_server_stub, args=(args.host, args.control_server_port), daemon=True)
+    control_server_stub.start()
+    for configuration, runtime_tuning in CONFIGURATIONS.items():
+        environment = os.environ | {
+            'RKSOK_SERVER_HOST': args.host,
+            'RKSOK_SERVER_PORT': str(args.port),
+            'RKSOK_RUNTIME_TUNING': runtime_tuning,
+            'RKSOK_DB_BACKEND': 'memory',
+            'RKSOK_CONTROL_SERVER_HOST': args.host,
+            'RKSOK_CONTROL_SERVER_PORT': str(args.control_server_port),
+        }
+        server_process = subprocess.Popen(
+            [sys.executable, 'server.py'],
+            cwd=SOURCE_DIR_PATH,
+            env=environment,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            asyncio.run(wait_for_server(host=args.host, port=args.port, timeout=args.start_timeout))
+            print(f'\n{configuration} configuration ({args.requests} requests per level)')
+            print('concurrency |      rps |  p50, ms |  p99, ms | errors')
+            for concurrency in args.concurrency:
+                print(asyncio.run(run_load(
+                    host=args.host, port=args.port, concurrency=concurrency, requests_count=args.requests)))
+        finally:
+            server_process.terminate()
+            server_process.wait()
+    control_server_stub.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -7,17 +7,68 @@ SERVER_HOST = getenv('RKSOK_SERVER_HOST')
 SERVER_PORT = getenv('RKSOK_SERVER_PORT')
 CLIENT_REQUEST_TIMEOUT = 30
 
+# Connection manager conf
+CLIENT_FIRST_BYTE_TIMEOUT = 5
+CLIENT_MIN_RECEIVE_RATE = 64  # bytes per second, checked after CLIENT_RECEIVE_RATE_GRACE_PERIOD seconds
+CLIENT_RECEIVE_RATE_GRACE_PERIOD = 5
+CONNECTION_REAPER_INTERVAL = 1
+CONNECTION_FD_USAGE_THRESHOLD = 0.8  # share of open files limit when idle connections are evicted
+
+# Runtime conf, RKSOK_RUNTIME_TUNING=0 keeps default asyncio event loop and socket options
+RUNTIME_TUNING = getenv('RKSOK_RUNTIME_TUNING', default='1') == '1'
+USE_UVLOOP = True
+SERVER_LISTEN_BACKLOG = 1024
+# set on the listening socket, so accepted connections inherit them before the TCP handshake
+SOCKET_RECEIVE_BUFFER_SIZE = None  # bytes, None keeps system default
+SOCKET_SEND_BUFFER_SIZE = None  # bytes, None keeps system default
+SOCKET_DEFER_ACCEPT_TIMEOUT = 5  # seconds, Linux only, None disables
+
+# Shutdown and hot restart conf
+SHUTDOWN_DRAIN_TIMEOUT = 20
+INHERITED_LISTEN_FD = getenv('RKSOK_LISTEN_FD')  # set for the process started by hot restart
+PREDECESSOR_PID = getenv('RKSOK_PREDECESSOR_PID')  # set for the process started by hot restart
+SUCCESSOR_POLL_INTERVAL = 1  # seconds, how often hot restart checks that the started process is alive
+
+# Admin server conf (readiness probe and monitoring), disabled unless port is specified
+ADMIN_SERVER_HOST = getenv('RKSOK_ADMIN_HOST', default='127.0.0.1')
+ADMIN_SERVER_PORT = getenv('RKSOK_ADMIN_PORT')
+
 # Control server conf
-CONTROL_SERVER_HOST = 'vragi-vezde.to.digital'
-CONTROL_SERVER_PORT = 51624
+CONTROL_SERVER_HOST = getenv('RKSOK_CONTROL_SERVER_HOST', default='vragi-vezde.to.digital')
+CONTROL_SERVER_PORT = int(getenv('RKSOK_CONTROL_SERVER_PORT', default='51624'))
+CONTROL_SERVER_CONNECTION_TIMEOUT = 5
 
-# DB conf
+# DB conf, RKSOK_DB_BACKEND=memory keeps records in the server process memory instead of mongodb
+DB_BACKEND = getenv('RKSOK_DB_BACKEND', default='mongo')
 MONGO_CONNECTION_URI = getenv('MONGO_CONNECTION_URI', default='mongodb://localhost:27017')
 MONGO_CONNECTION_MS_TIMEOUT = 15000
 MONGO_DB_NAME = 'phone_numbers'
+MONGO_MIN_POOL_SIZE = 10
+MONGO_MAX_POOL_SIZE = 100
 
 # Request processing conf
 DB_QUERY_EXEC_TIMEOUT = 10
 ENCODING = 'UTF-8'
 READ_BLOCK_SIZE = 1024
 REQUEST_END = '\r\n\r\n'
+
+# Response cache conf, disabled unless RKSOK_RESPONSE_CACHE=1
+RESPONSE_CACHE_ENABLED = getenv('RKSOK_RESPONSE_CACHE', default='0') == '1'
+RESPONSE_CACHE_MAX_BYTES = 16 * 1024 * 1024
+RESPONSE_CACHE_TTL = 5  # seconds, cached replies include the control server permission
+
+# Traffic capture conf, disabled unless path is specified
+TRAFFIC_CAPTURE_PATH = getenv('RKSOK_TRAFFIC_CAPTURE_PATH')
+
+# Circuit breakers conf
+CIRCUIT_BREAKER_WINDOW_SIZE = 20
+CIRCUIT_BREAKER_MIN_CALLS = 5
+CIRCUIT_BREAKER_FAILURE_RATE_THRESHOLD = 0.5
+CIRCUIT_BREAKER_PROBE_INTERVAL = 5
+
+# Profiler conf
+PROFILES_DIR_PATH = SOURCE_DIR_PATH + '/logs/profiles'
+PROFILER_SAMPLE_RATE = 100
+PROFILER_STACK_SAMPLE_INTERVAL = 0.005
+PROFILER_TRACEMALLOC_FRAMES = 10
+PROFILER_TOP_STATS_COUNT = 30
@@ -14,6 +14,10 @@ class IncorrectPortError(Exception):
     pass
 
 
+class CanNotReadCaptureError(Exception):
+    pass
+
+
 # ---------------- Exceptions for catching in process_request func from server.py ----------------
 class ServerBaseException(Exception):
     """
@@ -43,6 +47,18 @@ class MissingRKSOKConfigurationError(ServerBaseException):
     pass
 
 
+class ControlServerConnectionError(ServerBaseException):
+    pass
+
+
+class ResponseStreamError(ServerBaseException):
+    pass
+
+
+class CircuitBreakerOpenError(ServerBaseException):
+    pass
+
+
 # ---------------- Exceptions for catching in _check_request_data method of RKSOKProtocol instance ----------------
 class RequestCheckBaseException(Exception):
     """
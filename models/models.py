@@ -37,12 +37,15 @@ class RKSOKServerCommands:
     get: str
     put: str
     delete: str
+    search: str
 
 
 @dataclass(frozen=True, slots=True)
 class RKSOKServerConf:
     protocol: str
     max_name_length: int
+    search_page_size: int
+    next_page_marker: str
     command_names: RKSOKServerCommands
     response_names: RKSOKServerResponses
 
@@ -56,3 +59,72 @@ class TaskStatus(Enum):
 class TaskResult:
     status: TaskStatus
     result: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class PhoneRecord:
+    name: str
+    phone: str
+
+
+class CircuitBreakerState(Enum):
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+
+@dataclass(frozen=True, slots=True)
+class CircuitBreakerStats:
+    name: str
+    state: CircuitBreakerState
+    failure_rate: float
+    calls_in_window: int
+    rejected_calls: int
+
+
+@dataclass(frozen=True, slots=True)
+class StartupReport:
+    is_warmed_up: bool
+    steps_duration: dict[str, float]
+    total_duration: float
+
+
+class DBBackend(Enum):
+    MONGO = 'mongo'
+    MEMORY = 'memory'
+
+
+class ProfilerMode(Enum):
+    OFF = 'off'
+    CPROFILE = 'cprofile'
+    STACK_SAMPLER = 'stack'
+
+
+@dataclass(frozen=True, slots=True)
+class CapturedExchange:
+    timestamp: float
+    client_address: str
+    request: bytes
+    response: bytes
+
+
+class EvictionReason(Enum):
+    FIRST_BYTE_TIMEOUT = 'first byte timeout'
+    SLOW_RECEIVE_RATE = 'slow receive rate'
+    FD_PRESSURE = 'open files limit pressure'
+
+
+@dataclass(frozen=True, slots=True)
+class ConnectionsStats:
+    active_connections: int
+    reading_connections: int
+    connections_limit: int
+    evictions: dict[EvictionReason, int]
+
+
+@dataclass(frozen=True, slots=True)
+class ResponseCacheStats:
+    entries: int
+    total_bytes: int
+    hits: int
+    misses: int
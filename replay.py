@@ -0,0 +1,121 @@
+import argparse
+import asyncio
+import statistics
+import time
+from dataclasses import dataclass
+
+from config import CLIENT_REQUEST_TIMEOUT
+from models.models import CapturedExchange
+from service.traffic_capture import read_capture
+
+
+@dataclass(slots=True)
+class ReplayResult:
+    latency: float
+    response: bytes | None
+    error: str | None
+
+
+async def _replay_exchange(
+        exchange: CapturedExchange,
+        host: str,
+        port: int,
+        semaphore: asyncio.Semaphore,
+        timeout: float,
+) -> ReplayResult:
+    """Sends captured request to the server and reads the response until the server closes connection."""
+    async with semaphore:
+        started_at = time.perf_counter()
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(host=host, port=port), timeout=timeout)
+            writer.write(exchange.request)
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), timeout=timeout)
+            writer.close()
+        except (OSError, asyncio.TimeoutError) as replay_error:
+            return ReplayResult(latency=time.perf_counter() - started_at, response=None, error=repr(replay_error))
+        return ReplayResult(latency=time.perf_counter() - started_at, response=response, error=None)
+
+
+async def replay(
+        capture_path: str,
+        host: str,
+        port: int,
+        speed: float,
+        concurrency: int,
+        timeout: float,
+) -> list[tuple[CapturedExchange, ReplayResult]]:
+    """
+    Re-drives captured requests against the server. With speed=1 requests keep the original timing,
+    speed=N replays N times faster, speed=0 sends requests as fast as possible.
+    At most concurrency requests are in flight at once.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    exchanges, tasks = [], []
+    first_timestamp, started_at = None, time.perf_counter()
+    for exchange in read_capture(capture_path):
+        if first_timestamp is None:
+            first_timestamp = exchange.timestamp
+        if speed > 0:
+            delay = (exchange.timestamp - first_timestamp) / speed - (time.perf_counter() - started_at)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        exchanges.append(exchange)
+        tasks.append(asyncio.create_task(_replay_exchange(
+            exchange=exchange, host=host, port=port, semaphore=semaphore, timeout=timeout)))
+    return list(zip(exchanges, await asyncio.gather(*tasks)))
+
+
+def print_report(results: list[tuple[CapturedExchange, ReplayResult]], duration: float, shown_diffs: int) -> None:
+    """Prints response differences and latency distribution of the replay."""
+    if not results:
+        print('Capture is empty')
+        return
+    errors = [(exchange, result) for exchange, result in results if result.error is not None]
+    mismatches = [
+        (exchange, result) for exchange, result in results
+        if result.error is None and result.response != exchange.response
+    ]
+    print(f'Replayed {len(results)} requests in {duration:.3f} s ({len(results) / duration:.1f} rps)')
+    print(f'Errors: {len(errors)}, response mismatches: {len(mismatches)}')
+    for exchange, result in (errors + mismatches)[:shown_diffs]:
+        print(f'\nRequest: {exchange.request!r}\nCaptured: {exchange.response!r}\nReplayed: {result.response!r}')
+        if result.error is not None:
+            print(f'Error: {result.error}')
+
+    latencies = sorted(result.latency * 1000 for _, result in results if result.error is None)
+    if len(latencies) > 1:
+        percentiles = statistics.quantiles(latencies, n=100, method='inclusive')
+        print(
+            f'\nLatency, ms: min {latencies[0]:.2f}, p50 {percentiles[49]:.2f}, p90 {percentiles[89]:.2f}, '
+            f'p99 {percentiles[98]:.2f}, max {latencies[-1]:.2f}'
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Replays RKSOK traffic capture against the server.')
+    parser.add_argument('capture_path', help='path to the capture written with RKSOK_TRAFFIC_CAPTURE_PATH')
+    parser.add_argument('host')
+    parser.add_argument('port', type=int)
+    parser.add_argument(
+        '--speed', type=float, default=1.0,
+        help='1 keeps the original timing, N replays N times faster, 0 replays as fast as possible')
+    parser.add_argument('--concurrency', type=int, default=100, help='max number of requests in flight')
+    parser.add_argument('--timeout', type=float, default=CLIENT_REQUEST_TIMEOUT, help='request timeout, seconds')
+    parser.add_argument('--shown-diffs', type=int, default=10, help='number of printed mismatched responses')
+    args = parser.parse_args()
+
+    started_at = time.perf_counter()
+    results = asyncio.run(replay(
+        capture_path=args.capture_path,
+        host=args.host,
+        port=args.port,
+        speed=args.speed,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+    ))
+    print_report(results=results, duration=time.perf_counter() - started_at, shown_diffs=args.shown_diffs)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,39 +1,220 @@
 import asyncio
+import signal
+import time
 from asyncio import StreamReader, StreamWriter
+from http import HTTPStatus
+from typing import AsyncGenerator, Optional
 
-from config import SERVER_HOST, SERVER_PORT, ENCODING
-from exceptions import IncorrectHostError, IncorrectPortError, ServerBaseException
+from config import (
+    ADMIN_SERVER_HOST,
+    ADMIN_SERVER_PORT,
+    ENCODING,
+    PROFILER_SAMPLE_RATE,
+    RESPONSE_CACHE_ENABLED,
+    SERVER_HOST,
+    SERVER_PORT,
+    TRAFFIC_CAPTURE_PATH,
+)
+from exceptions import CircuitBreakerOpenError, IncorrectHostError, IncorrectPortError, ServerBaseException
+from models.models import CapturedExchange, CircuitBreakerState, ProfilerMode, StartupReport
+from service.admin_server import register_admin_route, start_admin_server
+from service.circuit_breaker import get_circuit_breakers_stats, MONGO_CIRCUIT_BREAKER
+from service.connection_manager import ConnectionManager
 from service.data_reader import read_data_with_timeout
-from service.db import RKSOKMongoClient
+from service.db import get_database, RKSOKDatabase
+from service.lifecycle import drain, get_inherited_socket, HotRestarter, notify_predecessor
 from service.logger import logger
-from service.request_handler import process_client_request
+from service.profiler import REQUEST_PROFILER
+from service.protocols import RKSOKResponse
+from service.request_handler import get_unavailable_response, process_client_request
+from service.response_cache import ResponseCache
+from service.runtime import (
+    configure_listening_sockets,
+    get_listen_backlog,
+    install_event_loop_policy,
+)
+from service.startup import warm_up
+from service.traffic_capture import TrafficCaptureWriter
 from utils import check_host_port
 
 
+async def _get_response(
+        request: str,
+        client_address: tuple,
+        db_client: RKSOKDatabase,
+        response_cache: Optional[ResponseCache],
+) -> RKSOKResponse:
+    """Connects to the client collection and processes request with the client of the collection."""
+    try:
+        collection_client = await db_client.connect_to_db(user_id=client_address[0])
+    except CircuitBreakerOpenError as breaker_error:
+        logger.error(f'Exception happened: {breaker_error}')
+        return get_unavailable_response(reason=str(breaker_error))
+    logger.debug('Starting request processing...')
+    return await process_client_request(
+        request=request, db_client=collection_client, response_cache=response_cache, namespace=client_address[0])
+
+
+async def _write_response_stream(
+        writer: StreamWriter,
+        response_stream: AsyncGenerator[str, None],
+        written_parts: Optional[list[bytes]],
+) -> None:
+    """
+    Writes response parts to the client as they come, appends written encoded parts to written_parts
+    if it is specified. The stream is closed by the task which started it even if writing fails.
+    """
+    try:
+        async for response_part in response_stream:
+            encoded_part = response_part.encode(encoding=ENCODING)
+            writer.write(encoded_part)
+            if written_parts is not None:
+                written_parts.append(encoded_part)
+            await writer.drain()
+    finally:
+        await response_stream.aclose()
+
+
 async def process_request(
         reader: StreamReader,
         writer: StreamWriter,
-        db_client: RKSOKMongoClient,
+        db_client: RKSOKDatabase,
+        connection_manager: ConnectionManager,
+        response_cache: Optional[ResponseCache] = None,
+        traffic_capture: Optional[TrafficCaptureWriter] = None,
 ) -> None:
-    """Callback for asyncio streams server."""
-    try:
-        client_address = writer.get_extra_info('peername')
-        logger.debug(f'New connection from {client_address!r}')
-        request = await read_data_with_timeout(reader=reader)
-        logger.info(f'Received {request!r} from {client_address!r}')
-
-        await db_client.connect_to_db(user_id=client_address[0])
-        logger.debug('Starting request processing...')
-        response = await process_client_request(request=request, db_client=db_client)
-        logger.info(f'Send {response!r} to {client_address!r}')
-    except ServerBaseException as server_exception:
-        logger.error(f'Exception happened: {server_exception}')
+    """
+    Callback for asyncio streams server. Connection is tracked by connection_manager,
+    replies cached in response_cache are sent without processing the request,
+    exchanges are written to traffic_capture if it is specified, including ones which failed
+    with the request or the response received or written so far.
+    """
+    client_address = writer.get_extra_info('peername')
+    received_at = time.time()
+    request_blocks: list[bytes] = []
+    response_parts: list[bytes] = []
+
+    def capture_exchange() -> None:
+        traffic_capture.write(CapturedExchange(
+            timestamp=received_at,
+            client_address=f'{client_address[0]}:{client_address[1]}',
+            request=b''.join(request_blocks),
+            response=b''.join(response_parts),
+        ))
+
+    with connection_manager.track(client_address=client_address) as connection:
+        def on_block(block: bytes) -> None:
+            connection.record_received(size=len(block))
+            if traffic_capture is not None:
+                request_blocks.append(block)
+
+        try:
+            logger.debug(f'New connection from {client_address!r}')
+            request = await read_data_with_timeout(reader=reader, on_block=on_block)
+            connection.finish_reading()
+            received_at = time.time()
+            logger.info(f'Received {request!r} from {client_address!r}')
+
+            response = None
+            if response_cache is not None:
+                response = response_cache.get(namespace=client_address[0], request=request)
+            if response is not None:
+                logger.info(f'Send cached {response!r} to {client_address!r}')
+            else:
+                response_getting = _get_response(
+                    request=request, client_address=client_address, db_client=db_client, response_cache=response_cache)
+                if REQUEST_PROFILER.is_profiling_requests:
+                    response = await REQUEST_PROFILER.profile_request(response_getting)
+                else:
+                    response = await response_getting
+                if isinstance(response, str):
+                    logger.info(f'Send {response!r} to {client_address!r}')
+                else:
+                    logger.info(f'Stream response to {client_address!r}')
+
+            if isinstance(response, bytes):
+                writer.write(response)
+                response_parts.append(response)
+            elif isinstance(response, str):
+                encoded_response = response.encode(encoding=ENCODING)
+                writer.write(encoded_response)
+                response_parts.append(encoded_response)
+            else:
+                await _write_response_stream(
+                    writer=writer,
+                    response_stream=response,
+                    written_parts=response_parts if traffic_capture is not None else None,
+                )
+            if traffic_capture is not None:
+                capture_exchange()
+            await writer.drain()
+        except ServerBaseException as server_exception:
+            logger.error(f'Exception happened: {server_exception}')
+            if traffic_capture is not None:
+                capture_exchange()
+        except asyncio.CancelledError:
+            # connection was evicted or was not served before shutdown, possibly while the response
+            # was being written; asyncio streams fail on cancelled client callbacks, so the task finishes normally
+            logger.debug(f'Connection to {client_address!r} was cancelled')
+        finally:
+            logger.debug(f'Close the connection to {client_address!r}')
+            writer.close()
+
+
+def register_monitoring_routes(
+        server: asyncio.Server,
+        db_client: RKSOKDatabase,
+        connection_manager: ConnectionManager,
+        response_cache: Optional[ResponseCache],
+        startup_report: StartupReport,
+) -> None:
+    """Registers readiness probe and monitoring routes of the admin server."""
+    def check_readiness(params: dict[str, str]) -> tuple[HTTPStatus, str]:
+        is_ready = (
+            server.is_serving() and
+            db_client.is_connected and
+            MONGO_CIRCUIT_BREAKER.state != CircuitBreakerState.OPEN
+        )
+        return (HTTPStatus.OK, 'ready\n') if is_ready else (HTTPStatus.SERVICE_UNAVAILABLE, 'not ready\n')
+
+    register_admin_route('/ready', check_readiness)
+    register_admin_route('/startup', lambda params: (HTTPStatus.OK, f'{startup_report}\n'))
+    register_admin_route(
+        '/breakers', lambda params: (HTTPStatus.OK, ''.join(f'{stats}\n' for stats in get_circuit_breakers_stats())))
+    register_admin_route('/connections', lambda params: (HTTPStatus.OK, f'{connection_manager.get_stats()}\n'))
+    if response_cache is not None:
+        register_admin_route('/cache', lambda params: (HTTPStatus.OK, f'{response_cache.get_stats()}\n'))
+
+
+def register_profiler_routes() -> None:
+    """Registers admin server routes which control the request profiler."""
+    def start_profiling(params: dict[str, str]) -> tuple[HTTPStatus, str]:
+        try:
+            mode = ProfilerMode(params.get('mode', ProfilerMode.CPROFILE.value))
+            sample_rate = int(params.get('sample_rate', PROFILER_SAMPLE_RATE))
+        except ValueError as params_error:
+            return HTTPStatus.BAD_REQUEST, f'{params_error}\n'
+        REQUEST_PROFILER.start(mode=mode, sample_rate=sample_rate)
+        return HTTPStatus.OK, f'Started {mode.value} profiling\n'
+
+    register_admin_route('/profiler/start', start_profiling)
+    register_admin_route('/profiler/stop', lambda params: (HTTPStatus.OK, f'{REQUEST_PROFILER.stop()}\n'))
+    register_admin_route(
+        '/profiler/memory_snapshot', lambda params: (HTTPStatus.OK, f'{REQUEST_PROFILER.take_memory_snapshot()}\n'))
+
+    def stop_memory_tracing(params: dict[str, str]) -> tuple[HTTPStatus, str]:
+        REQUEST_PROFILER.stop_memory_tracing()
+        return HTTPStatus.OK, 'Stopped memory tracing\n'
+
+    register_admin_route('/profiler/memory_stop', stop_memory_tracing)
+
+
+def toggle_profiling() -> None:
+    """SIGUSR1 handler, starts cProfile requests sampling or stops running profiling."""
+    if REQUEST_PROFILER.mode == ProfilerMode.OFF:
+        REQUEST_PROFILER.start(mode=ProfilerMode.CPROFILE)
     else:
-        writer.write(response.encode(encoding=ENCODING))
-        await writer.drain()
-    finally:
-        logger.debug(f'Close the connection to {client_address!r}')
-        writer.close()
+        REQUEST_PROFILER.stop()
 
 
 async def main() -> None:
@@ -42,20 +223,69 @@ async def main() -> None:
     except (IncorrectHostError, IncorrectPortError) as connection_data_error:
         logger.error(f'Exception during checking host and port of the server: {connection_data_error}')
         raise KeyboardInterrupt
-    db_client = RKSOKMongoClient()
+    db_client = get_database()
+    startup_report = await warm_up(db_client=db_client)
+    traffic_capture = None
+    if TRAFFIC_CAPTURE_PATH is not None:
+        traffic_capture = TrafficCaptureWriter(path=TRAFFIC_CAPTURE_PATH)
+        logger.debug(f'Capturing traffic to {TRAFFIC_CAPTURE_PATH}')
+    response_cache = ResponseCache() if RESPONSE_CACHE_ENABLED else None
+    connection_manager = ConnectionManager()
+    reaper_task = asyncio.create_task(connection_manager.run_reaper())
+    inherited_socket = get_inherited_socket()
+    if inherited_socket is not None:
+        listen_address = {'sock': inherited_socket}
+    else:
+        listen_address = {'host': SERVER_HOST, 'port': int(SERVER_PORT)}
     server = await asyncio.start_server(
-        lambda reader, writer: process_request(reader=reader, writer=writer, db_client=db_client),
-        host=SERVER_HOST,
-        port=int(SERVER_PORT),
+        lambda reader, writer: process_request(
+            reader=reader,
+            writer=writer,
+            db_client=db_client,
+            connection_manager=connection_manager,
+            response_cache=response_cache,
+            traffic_capture=traffic_capture,
+        ),
+        **listen_address,
+        backlog=get_listen_backlog(),
     )
+    configure_listening_sockets(server=server)
     logger.debug(f'Started RKSOK server on {SERVER_HOST}:{SERVER_PORT}')
-    async with server:
-        await server.serve_forever()
+    servers = [server]
+    if ADMIN_SERVER_PORT is not None:
+        register_monitoring_routes(
+            server=server,
+            db_client=db_client,
+            connection_manager=connection_manager,
+            response_cache=response_cache,
+            startup_report=startup_report,
+        )
+        register_profiler_routes()
+        servers.append(await start_admin_server(host=ADMIN_SERVER_HOST, port=int(ADMIN_SERVER_PORT)))
+
+    shutdown_requested = asyncio.Event()
+    hot_restarter = HotRestarter(server=server)
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGUSR1, toggle_profiling)
+    loop.add_signal_handler(signal.SIGUSR2, REQUEST_PROFILER.take_memory_snapshot)
+    loop.add_signal_handler(signal.SIGHUP, hot_restarter.restart)
+    loop.add_signal_handler(signal.SIGTERM, shutdown_requested.set)
+    loop.add_signal_handler(signal.SIGINT, shutdown_requested.set)
+    notify_predecessor()
+    try:
+        await shutdown_requested.wait()
+        await drain(servers=servers, connection_manager=connection_manager)
+    finally:
+        reaper_task.cancel()
+        hot_restarter.stop_watching()
+        if traffic_capture is not None:
+            traffic_capture.close()
 
 
 if __name__ == '__main__':
+    install_event_loop_policy()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
         logger.info('Interrupting server...')
-        logger.debug('RKSOK server stopped working.')
+    logger.debug('RKSOK server stopped working.')
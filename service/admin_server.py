@@ -0,0 +1,65 @@
+import asyncio
+from asyncio import StreamReader, StreamWriter
+from http import HTTPStatus
+from typing import Callable
+from urllib.parse import parse_qsl, urlsplit
+
+from config import ENCODING
+from exceptions import ServerBaseException
+from service.data_reader import read_data_with_timeout
+from service.logger import logger
+
+# Handler takes query parameters of the request and returns response status and text body
+AdminRouteHandler = Callable[[dict[str, str]], tuple[HTTPStatus, str]]
+
+_routes: dict[str, AdminRouteHandler] = {}
+
+
+def register_admin_route(path: str, handler: AdminRouteHandler) -> None:
+    """Adds handler for GET requests to the path of the admin server."""
+    _routes[path] = handler
+
+
+def _format_http_response(status: HTTPStatus, body: str) -> bytes:
+    """Formats minimal HTTP/1.1 response with text body."""
+    encoded_body = body.encode(encoding=ENCODING)
+    head = (
+        f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+        f'Content-Type: text/plain; charset={ENCODING}\r\n'
+        f'Content-Length: {len(encoded_body)}\r\n'
+        'Connection: close\r\n\r\n'
+    )
+    return head.encode(encoding=ENCODING) + encoded_body
+
+
+async def _process_admin_request(reader: StreamReader, writer: StreamWriter) -> None:
+    """Callback for admin asyncio streams server, serves registered routes over plain HTTP."""
+    try:
+        request = await read_data_with_timeout(reader=reader)
+        request_line = request.split('\r\n', 1)[0].split(' ')
+        if len(request_line) != 3 or request_line[0] != 'GET':
+            response = _format_http_response(HTTPStatus.BAD_REQUEST, 'Only GET requests are supported\n')
+        else:
+            url = urlsplit(request_line[1])
+            handler = _routes.get(url.path)
+            if handler is None:
+                response = _format_http_response(HTTPStatus.NOT_FOUND, f'Available routes: {sorted(_routes)}\n')
+            else:
+                response = _format_http_response(*handler(dict(parse_qsl(url.query))))
+    except ServerBaseException as server_exception:
+        logger.error(f'Exception happened in admin server: {server_exception}')
+    else:
+        writer.write(response)
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def start_admin_server(host: str, port: int) -> asyncio.Server:
+    """
+    Starts admin server used for readiness probe and monitoring.
+    The port is reused, so the process started by hot restart can bind it while the predecessor drains.
+    """
+    server = await asyncio.start_server(_process_admin_request, host=host, port=port, reuse_port=True)
+    logger.debug(f'Started admin server on {host}:{port}, routes: {sorted(_routes)}')
+    return server
@@ -0,0 +1,133 @@
+import asyncio
+import time
+from collections import deque
+from typing import Optional
+
+from config import (
+    CIRCUIT_BREAKER_FAILURE_RATE_THRESHOLD,
+    CIRCUIT_BREAKER_MIN_CALLS,
+    CIRCUIT_BREAKER_PROBE_INTERVAL,
+    CIRCUIT_BREAKER_WINDOW_SIZE,
+)
+from exceptions import CircuitBreakerOpenError
+from models.models import CircuitBreakerState, CircuitBreakerStats
+from service.logger import logger
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for an external dependency, used as an async context manager.
+    Outcomes of the last window_size calls are kept; when at least min_calls of them are known
+    and the failure rate reaches failure_rate_threshold the breaker opens and every call fails fast
+    with CircuitBreakerOpenError. After probe_interval seconds one probe call is let through (half-open state):
+    its success closes the breaker, its failure opens it again. The probe is held by the task which made it,
+    so calls started before the breaker opened do not change half-open state when they finish.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            window_size: Optional[int] = CIRCUIT_BREAKER_WINDOW_SIZE,
+            min_calls: Optional[int] = CIRCUIT_BREAKER_MIN_CALLS,
+            failure_rate_threshold: Optional[float] = CIRCUIT_BREAKER_FAILURE_RATE_THRESHOLD,
+            probe_interval: Optional[float] = CIRCUIT_BREAKER_PROBE_INTERVAL,
+    ) -> None:
+        self.name = name
+        self._min_calls = min_calls
+        self._failure_rate_threshold = failure_rate_threshold
+        self._probe_interval = probe_interval
+        self._outcomes: deque[bool] = deque(maxlen=window_size)
+        self._state = CircuitBreakerState.CLOSED
+        self._opened_at = 0.0
+        self._probe_task: asyncio.Task | None = None
+        self._rejected_calls = 0
+
+    @property
+    def state(self) -> CircuitBreakerState:
+        return self._state
+
+    @property
+    def failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def get_stats(self) -> CircuitBreakerStats:
+        """Returns current breaker state for monitoring."""
+        return CircuitBreakerStats(
+            name=self.name,
+            state=self._state,
+            failure_rate=self.failure_rate,
+            calls_in_window=len(self._outcomes),
+            rejected_calls=self._rejected_calls,
+        )
+
+    def _set_state(self, state: CircuitBreakerState) -> None:
+        if state == self._state:
+            return
+        logger.warning(f'Circuit breaker {self.name!r}: {self._state.value} -> {state.value}')
+        self._state = state
+        if state == CircuitBreakerState.OPEN:
+            self._opened_at = time.monotonic()
+        elif state == CircuitBreakerState.CLOSED:
+            self._outcomes.clear()
+
+    def before_call(self) -> None:
+        """Lets the call through or raises CircuitBreakerOpenError if the dependency is considered unavailable."""
+        if self._state == CircuitBreakerState.CLOSED:
+            return
+        if self._state == CircuitBreakerState.OPEN and time.monotonic() - self._opened_at >= self._probe_interval:
+            self._set_state(CircuitBreakerState.HALF_OPEN)
+        if self._state == CircuitBreakerState.HALF_OPEN and self._probe_task is None:
+            self._probe_task = asyncio.current_task()
+            return
+        self.reject_call()
+
+    def reject_call(self) -> None:
+        """Raises CircuitBreakerOpenError for the call which can not be let through."""
+        self._rejected_calls += 1
+        raise CircuitBreakerOpenError(f'{self.name} is unavailable, try again later')
+
+    def _is_probe(self) -> bool:
+        return self._probe_task is not None and asyncio.current_task() is self._probe_task
+
+    def record_success(self) -> None:
+        if self._is_probe():
+            self._probe_task = None
+            self._set_state(CircuitBreakerState.CLOSED)
+        elif self._state == CircuitBreakerState.CLOSED:
+            self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        if self._is_probe():
+            self._probe_task = None
+            self._set_state(CircuitBreakerState.OPEN)
+            return
+        if self._state != CircuitBreakerState.CLOSED:
+            # call was started before the breaker opened
+            return
+        self._outcomes.append(False)
+        if len(self._outcomes) >= self._min_calls and self.failure_rate >= self._failure_rate_threshold:
+            self._set_state(CircuitBreakerState.OPEN)
+
+    async def __aenter__(self) -> 'CircuitBreaker':
+        self.before_call()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.record_success()
+        elif issubclass(exc_type, Exception):
+            self.record_failure()
+        elif self._is_probe():
+            # probe was cancelled and tells nothing about the dependency, let the next call probe
+            self._probe_task = None
+
+
+MONGO_CIRCUIT_BREAKER = CircuitBreaker(name='MongoDB')
+CONTROL_SERVER_CIRCUIT_BREAKER = CircuitBreaker(name='Control server')
+
+
+def get_circuit_breakers_stats() -> list[CircuitBreakerStats]:
+    """Returns states of all dependency breakers for monitoring."""
+    return [breaker.get_stats() for breaker in (MONGO_CIRCUIT_BREAKER, CONTROL_SERVER_CIRCUIT_BREAKER)]
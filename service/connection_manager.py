@@ -0,0 +1,135 @@
+import asyncio
+import resource
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from config import (
+    CLIENT_FIRST_BYTE_TIMEOUT,
+    CLIENT_MIN_RECEIVE_RATE,
+    CLIENT_RECEIVE_RATE_GRACE_PERIOD,
+    CONNECTION_FD_USAGE_THRESHOLD,
+    CONNECTION_REAPER_INTERVAL,
+)
+from models.models import ConnectionsStats, EvictionReason
+from service.logger import logger
+
+
+class TrackedConnection:
+    """Live client connection state, updated by the connection task while it reads the request."""
+    __slots__ = ('task', 'client_address', 'opened_at', 'last_received_at', 'bytes_received', 'is_reading')
+
+    def __init__(self, task: asyncio.Task, client_address: tuple) -> None:
+        self.task = task
+        self.client_address = client_address
+        self.opened_at = self.last_received_at = time.monotonic()
+        self.bytes_received = 0
+        self.is_reading = True
+
+    def record_received(self, size: int) -> None:
+        self.bytes_received += size
+        self.last_received_at = time.monotonic()
+
+    def finish_reading(self) -> None:
+        self.is_reading = False
+
+
+class ConnectionManager:
+    """
+    Tracks live client connections and evicts ones which are still reading the request
+    but sent no bytes for first_byte_timeout seconds, receive slower than min_receive_rate bytes per second,
+    or are the most idle ones when the number of connections approaches the open files limit.
+    Evicted connection tasks are cancelled, evictions are counted for monitoring.
+    """
+
+    def __init__(
+            self,
+            first_byte_timeout: Optional[float] = CLIENT_FIRST_BYTE_TIMEOUT,
+            min_receive_rate: Optional[float] = CLIENT_MIN_RECEIVE_RATE,
+            receive_rate_grace_period: Optional[float] = CLIENT_RECEIVE_RATE_GRACE_PERIOD,
+            fd_usage_threshold: Optional[float] = CONNECTION_FD_USAGE_THRESHOLD,
+    ) -> None:
+        self._first_byte_timeout = first_byte_timeout
+        self._min_receive_rate = min_receive_rate
+        self._receive_rate_grace_period = receive_rate_grace_period
+        open_files_limit, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+        self.connections_limit = int(open_files_limit * fd_usage_threshold)
+        self._connections: dict[asyncio.Task, TrackedConnection] = {}
+        self._evictions: Counter[EvictionReason] = Counter()
+        self._all_closed = asyncio.Event()
+        self._all_closed.set()
+
+    @property
+    def active_connections(self) -> int:
+        return len(self._connections)
+
+    @contextmanager
+    def track(self, client_address: tuple) -> Iterator[TrackedConnection]:
+        """Tracks connection served by the current task until the context exits."""
+        task = asyncio.current_task()
+        connection = TrackedConnection(task=task, client_address=client_address)
+        self._connections[task] = connection
+        self._all_closed.clear()
+        try:
+            yield connection
+        finally:
+            del self._connections[task]
+            if not self._connections:
+                self._all_closed.set()
+
+    def _evict(self, connection: TrackedConnection, reason: EvictionReason) -> None:
+        logger.warning(
+            f'Evicting connection from {connection.client_address!r}: {reason.value}, '
+            f'received {connection.bytes_received} bytes in {time.monotonic() - connection.opened_at:.1f} s'
+        )
+        connection.is_reading = False
+        connection.task.cancel()
+        self._evictions[reason] += 1
+
+    def reap(self) -> None:
+        """Evicts slow and idle connections which are still reading the request."""
+        now = time.monotonic()
+        reading_connections = [connection for connection in self._connections.values() if connection.is_reading]
+        for connection in reading_connections:
+            lifetime = now - connection.opened_at
+            if connection.bytes_received == 0:
+                if lifetime > self._first_byte_timeout:
+                    self._evict(connection=connection, reason=EvictionReason.FIRST_BYTE_TIMEOUT)
+            elif (
+                    lifetime > self._receive_rate_grace_period and
+                    connection.bytes_received / lifetime < self._min_receive_rate
+            ):
+                self._evict(connection=connection, reason=EvictionReason.SLOW_RECEIVE_RATE)
+
+        idle_connections = [connection for connection in reading_connections if connection.is_reading]
+        evicted_connections = len(reading_connections) - len(idle_connections)
+        excess_connections = self.active_connections - evicted_connections - self.connections_limit
+        if excess_connections > 0:
+            idle_connections.sort(key=lambda connection: connection.last_received_at)
+            for connection in idle_connections[:excess_connections]:
+                self._evict(connection=connection, reason=EvictionReason.FD_PRESSURE)
+
+    async def run_reaper(self, interval: Optional[float] = CONNECTION_REAPER_INTERVAL) -> None:
+        """Runs reap() every interval seconds."""
+        while True:
+            await asyncio.sleep(interval)
+            self.reap()
+
+    async def wait_closed(self, timeout: float) -> None:
+        """Waits until all connections are served, then cancels connections left after timeout seconds."""
+        try:
+            await asyncio.wait_for(self._all_closed.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f'{self.active_connections} connections were not served in {timeout} s, cancelling them')
+            for connection in list(self._connections.values()):
+                connection.task.cancel()
+            await self._all_closed.wait()
+
+    def get_stats(self) -> ConnectionsStats:
+        return ConnectionsStats(
+            active_connections=self.active_connections,
+            reading_connections=sum(connection.is_reading for connection in self._connections.values()),
+            connections_limit=self.connections_limit,
+            evictions=dict(self._evictions),
+        )
@@ -1,8 +1,10 @@
 import asyncio
+import socket
 
-from config import CONTROL_SERVER_HOST, CONTROL_SERVER_PORT, ENCODING
-from exceptions import IncorrectHostError, IncorrectPortError
+from config import CONTROL_SERVER_CONNECTION_TIMEOUT, CONTROL_SERVER_HOST, CONTROL_SERVER_PORT, ENCODING
+from exceptions import ControlServerConnectionError, IncorrectHostError, IncorrectPortError
 from models.models import ControlServerConf, ControlServerResponse
+from service.circuit_breaker import CONTROL_SERVER_CIRCUIT_BREAKER
 from service.data_reader import read_data_with_timeout
 from service.logger import logger
 from utils import check_host_port
@@ -15,25 +17,58 @@ CONTROL_SERVER_CONF = ControlServerConf(
     responses=ControlServerResponse(yes='МОЖНА', no='НИЛЬЗЯ')
 )
 
+_resolved_hosts: dict[str, str] = {}
+
+
+async def resolve_control_server_address(server_conf: ControlServerConf) -> str:
+    """
+    Resolves control server host once and caches the address,
+    so requests do not pay for the DNS lookup while opening connections.
+    """
+    address_info = await asyncio.get_running_loop().getaddrinfo(
+        host=server_conf.host, port=server_conf.port, type=socket.SOCK_STREAM)
+    resolved_host = address_info[0][4][0]
+    _resolved_hosts[server_conf.host] = resolved_host
+    logger.debug(f'Control server {server_conf.host} resolved to {resolved_host}')
+    return resolved_host
+
 
 async def get_control_server_response(server_conf: ControlServerConf, request: str) -> str:
     """
     Sends permission request to the control server, then reads response.
     If host and port of the control server are incorrect function will return empty string.
+    Calls go through the control server circuit breaker, so while it is open CircuitBreakerOpenError
+    is raised immediately instead of waiting for the connection.
     """
     try:
         check_host_port(host=server_conf.host, port=server_conf.port)
     except (IncorrectHostError, IncorrectPortError) as connection_data_error:
         logger.error(f'Exception during checking host and port of the control server: {connection_data_error}')
         return ""
-    reader, writer = await asyncio.open_connection(host=server_conf.host, port=server_conf.port)
-    writer.write(f'{server_conf.ask_command} {server_conf.protocol}\r\n{request}'.encode(encoding=ENCODING))
-    await writer.drain()
+    async with CONTROL_SERVER_CIRCUIT_BREAKER:
+        host = _resolved_hosts.get(server_conf.host, server_conf.host)
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host=host, port=server_conf.port),
+                timeout=CONTROL_SERVER_CONNECTION_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            _resolved_hosts.pop(server_conf.host, None)
+            raise ControlServerConnectionError(
+                f'Timeout exceeded while connecting to the control server! '
+                f'Current timeout: {CONTROL_SERVER_CONNECTION_TIMEOUT} seconds.'
+            )
+        except OSError as connection_error:
+            # address may be outdated, next connection will resolve the host again
+            _resolved_hosts.pop(server_conf.host, None)
+            raise ControlServerConnectionError(f'Can not connect to the control server: {connection_error}')
+        writer.write(f'{server_conf.ask_command} {server_conf.protocol}\r\n{request}'.encode(encoding=ENCODING))
+        await writer.drain()
 
-    response = await read_data_with_timeout(reader=reader)
+        response = await read_data_with_timeout(reader=reader)
 
-    writer.close()
-    await writer.wait_closed()
+        writer.close()
+        await writer.wait_closed()
 
     logger.info(f'Control server response: {response}')
     return response
@@ -1,16 +1,23 @@
 import asyncio
-from typing import Optional
+from typing import Callable, Optional
 
 from config import CLIENT_REQUEST_TIMEOUT, ENCODING, READ_BLOCK_SIZE, REQUEST_END
 from exceptions import ReadTimeoutError
 
 
-async def _read_data(reader: asyncio.StreamReader, block_size: int, separator: str) -> str:
-    """Reads data from the stream until separator or eof"""
+async def _read_data(
+        reader: asyncio.StreamReader,
+        block_size: int,
+        separator: str,
+        on_block: Optional[Callable[[bytes], None]],
+) -> str:
+    """Reads data from the stream until separator or eof, passes every read block to on_block"""
     request = b''
     separator_bytes = separator.encode(encoding=ENCODING)
     while True:
         next_block = await reader.read(block_size)
+        if on_block is not None:
+            on_block(next_block)
         request += next_block
         if not next_block or next_block.endswith(separator_bytes):
             return request.decode(encoding=ENCODING)
@@ -21,11 +28,12 @@ async def read_data_with_timeout(
         block_size: Optional[int] = READ_BLOCK_SIZE,
         separator: Optional[str] = REQUEST_END,
         timeout: Optional[int] = CLIENT_REQUEST_TIMEOUT,
+        on_block: Optional[Callable[[bytes], None]] = None,
 ) -> str:
     """Reads data from the stream assuming timeout"""
     try:
         request = await asyncio.wait_for(
-            _read_data(reader=reader, block_size=block_size, separator=separator),
+            _read_data(reader=reader, block_size=block_size, separator=separator, on_block=on_block),
             timeout=timeout,
         )
     except asyncio.TimeoutError:
@@ -1,17 +1,27 @@
-from typing import Optional
+import asyncio
+from bisect import bisect_left, bisect_right, insort
+from typing import AsyncIterator, Optional
 
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
 from pymongo.errors import ServerSelectionTimeoutError
 from pymongo.results import DeleteResult
 
-from config import MONGO_DB_NAME, MONGO_CONNECTION_URI, MONGO_CONNECTION_MS_TIMEOUT
+from config import (
+    DB_BACKEND,
+    MONGO_CONNECTION_MS_TIMEOUT,
+    MONGO_CONNECTION_URI,
+    MONGO_DB_NAME,
+    MONGO_MAX_POOL_SIZE,
+    MONGO_MIN_POOL_SIZE,
+)
 from exceptions import DBConnectionError
 from service.logger import logger
-from models.models import TaskStatus, TaskResult
+from models.models import CircuitBreakerState, DBBackend, PhoneRecord, TaskStatus, TaskResult
+from service.circuit_breaker import MONGO_CIRCUIT_BREAKER
 
 
 class RKSOKDatabaseClient:
-    """Database interface."""
+    """Database interface, queries go to the collection of one user."""
 
     async def get(self, name: str) -> TaskResult:
         """Abstract method for getting data from db."""
@@ -25,14 +35,31 @@ class RKSOKDatabaseClient:
         """Abstract method for deleting data from db."""
         raise NotImplementedError()
 
+    def search_prefix(self, prefix: str, after: str | None, limit: int) -> AsyncIterator[PhoneRecord]:
+        """
+        Abstract method for iterating over at most limit records whose names start with prefix,
+        in names order, starting after the name after if it is specified.
+        """
+        raise NotImplementedError()
 
-class RKSOKMongoClient(RKSOKDatabaseClient):
-    """Mongo database for RKSOK protocol."""
 
-    def __init__(self) -> None:
-        self.client = None
-        self.collection = None
-        self._is_connected = False
+class RKSOKDatabase:
+    """
+    Database connection interface shared by all requests. connect_to_db() returns separate client
+    of the user collection, so concurrent requests of other users can not change it.
+    """
+
+    @property
+    def is_connected(self) -> bool:
+        raise NotImplementedError()
+
+    async def connect(self) -> None:
+        """Abstract method for connecting to db unless already connected."""
+        raise NotImplementedError()
+
+    async def warm_up_pool(self, min_pool_size: Optional[int] = MONGO_MIN_POOL_SIZE) -> None:
+        """Abstract method for opening min_pool_size db connections in advance."""
+        raise NotImplementedError()
 
     async def connect_to_db(
             self,
@@ -40,17 +67,28 @@ class RKSOKMongoClient(RKSOKDatabaseClient):
             db_name: Optional[str] = MONGO_DB_NAME,
             user_id: Optional[str] = 'user1',
             ms_timeout: Optional[int] = MONGO_CONNECTION_MS_TIMEOUT
-    ) -> None:
-        """Connects to mongodb unless already connected, creates new collection for new client."""
-        if not self._is_connected:
-            self.client = AsyncIOMotorClient(connection_uri, serverSelectionTimeoutMS=ms_timeout)
-            try:
-                await self.client.server_info()
-            except ServerSelectionTimeoutError:
-                raise DBConnectionError('Error connecting to the mongodb!')
-            self._is_connected = True
-            logger.debug(f'Successfully connected to MongoDb at {connection_uri}.')
-        self.collection = self.client[db_name][user_id]
+    ) -> RKSOKDatabaseClient:
+        """Abstract method for connecting to db and returning client of the user collection."""
+        raise NotImplementedError()
+
+
+def _get_prefix_upper_bound(prefix: str) -> str | None:
+    """Returns the least string greater than all strings starting with prefix, None if there is no such string."""
+    prefix = prefix.rstrip(chr(0x10FFFF))
+    if not prefix:
+        return None
+    next_code_point = ord(prefix[-1]) + 1
+    if 0xD800 <= next_code_point <= 0xDFFF:
+        # surrogates can not be encoded to BSON and are not found in names, so skip them
+        next_code_point = 0xE000
+    return prefix[:-1] + chr(next_code_point)
+
+
+class RKSOKMongoCollectionClient(RKSOKDatabaseClient):
+    """Mongo collection of one user for RKSOK protocol."""
+
+    def __init__(self, collection: AsyncIOMotorCollection) -> None:
+        self.collection = collection
 
     async def get(self, name: str) -> TaskResult:
         """Gets phone by name from db."""
@@ -69,3 +107,169 @@ class RKSOKMongoClient(RKSOKDatabaseClient):
         delete_result: DeleteResult = await self.collection.delete_one({'_id': name})
         status = TaskStatus.OK if delete_result.deleted_count == 1 else TaskStatus.NOT_OK
         return TaskResult(status=status, result=None)
+
+    async def search_prefix(self, prefix: str, after: str | None, limit: int) -> AsyncIterator[PhoneRecord]:
+        """Iterates over documents with names starting with prefix, runs range query over _id index."""
+        name_range = {'$gt': after} if after is not None and after >= prefix else {'$gte': prefix}
+        upper_bound = _get_prefix_upper_bound(prefix)
+        if upper_bound is not None:
+            name_range['$lt'] = upper_bound
+        cursor = self.collection.find({'_id': name_range}).sort('_id', 1).limit(limit)
+        async for document in cursor:
+            yield PhoneRecord(name=document['_id'], phone=document['phone'])
+
+
+class RKSOKMongoClient(RKSOKDatabase):
+    """Mongo database for RKSOK protocol."""
+
+    def __init__(self) -> None:
+        self.client = None
+        self._is_connected = False
+        self._connection_attempt: asyncio.Task | None = None
+
+    @property
+    def is_connected(self) -> bool:
+        return self._is_connected
+
+    async def connect(
+            self,
+            connection_uri: Optional[str] = MONGO_CONNECTION_URI,
+            ms_timeout: Optional[int] = MONGO_CONNECTION_MS_TIMEOUT,
+            min_pool_size: Optional[int] = MONGO_MIN_POOL_SIZE,
+            max_pool_size: Optional[int] = MONGO_MAX_POOL_SIZE,
+    ) -> None:
+        """
+        Connects to mongodb unless already connected. Concurrent callers wait for the same attempt
+        and all get its error if it fails, instead of building their own motor clients one after another.
+        Connection attempts go through the mongo circuit breaker, so while mongodb is known to be down
+        CircuitBreakerOpenError is raised without waiting for ms_timeout. Callers join the running attempt
+        only while the breaker is closed, otherwise the attempt is the breaker probe and they are rejected.
+        """
+        if self._is_connected:
+            return
+        if self._connection_attempt is not None and MONGO_CIRCUIT_BREAKER.state != CircuitBreakerState.CLOSED:
+            MONGO_CIRCUIT_BREAKER.reject_call()
+        if self._connection_attempt is None:
+            self._connection_attempt = asyncio.create_task(self._connect(
+                connection_uri=connection_uri,
+                ms_timeout=ms_timeout,
+                min_pool_size=min_pool_size,
+                max_pool_size=max_pool_size,
+            ))
+            self._connection_attempt.add_done_callback(self._finish_connection_attempt)
+        # cancelled caller does not cancel the attempt other callers wait for
+        await asyncio.shield(self._connection_attempt)
+
+    def _finish_connection_attempt(self, connection_attempt: asyncio.Task) -> None:
+        self._connection_attempt = None
+
+    async def _connect(self, connection_uri: str, ms_timeout: int, min_pool_size: int, max_pool_size: int) -> None:
+        async with MONGO_CIRCUIT_BREAKER:
+            client = AsyncIOMotorClient(
+                connection_uri,
+                serverSelectionTimeoutMS=ms_timeout,
+                minPoolSize=min_pool_size,
+                maxPoolSize=max_pool_size,
+            )
+            try:
+                await client.server_info()
+            except ServerSelectionTimeoutError:
+                raise DBConnectionError('Error connecting to the mongodb!')
+        self.client = client
+        self._is_connected = True
+        logger.debug(f'Successfully connected to MongoDb at {connection_uri}.')
+
+    async def warm_up_pool(self, min_pool_size: Optional[int] = MONGO_MIN_POOL_SIZE) -> None:
+        """Opens min_pool_size pool connections at once by running concurrent pings."""
+        await asyncio.gather(*(self.client.admin.command('ping') for _ in range(min_pool_size)))
+
+    async def connect_to_db(
+            self,
+            connection_uri: Optional[str] = MONGO_CONNECTION_URI,
+            db_name: Optional[str] = MONGO_DB_NAME,
+            user_id: Optional[str] = 'user1',
+            ms_timeout: Optional[int] = MONGO_CONNECTION_MS_TIMEOUT
+    ) -> RKSOKMongoCollectionClient:
+        """Connects to mongodb unless already connected, returns client of the user collection."""
+        await self.connect(connection_uri=connection_uri, ms_timeout=ms_timeout)
+        return RKSOKMongoCollectionClient(collection=self.client[db_name][user_id])
+
+
+class RKSOKInMemoryClient(RKSOKDatabaseClient):
+    """Records of one user kept in memory, names are kept in sorted index for prefix search."""
+
+    def __init__(self, phones: dict[str, str], sorted_names: list[str]) -> None:
+        self._phones = phones
+        self._sorted_names = sorted_names
+
+    async def get(self, name: str) -> TaskResult:
+        """Gets phone by name."""
+        phone = self._phones.get(name)
+        status = TaskStatus.OK if phone is not None else TaskStatus.NOT_OK
+        return TaskResult(status=status, result=phone)
+
+    async def update(self, name: str, value: str) -> TaskResult:
+        """Creates or updates record with name and phone."""
+        if name not in self._phones:
+            insort(self._sorted_names, name)
+        self._phones[name] = value
+        return TaskResult(status=TaskStatus.OK, result=None)
+
+    async def delete(self, name: str) -> TaskResult:
+        """Deletes record by name."""
+        if self._phones.pop(name, None) is None:
+            return TaskResult(status=TaskStatus.NOT_OK, result=None)
+        del self._sorted_names[bisect_left(self._sorted_names, name)]
+        return TaskResult(status=TaskStatus.OK, result=None)
+
+    async def search_prefix(self, prefix: str, after: str | None, limit: int) -> AsyncIterator[PhoneRecord]:
+        """Iterates over records with names starting with prefix using binary search over sorted names."""
+        if after is not None and after >= prefix:
+            index = bisect_right(self._sorted_names, after)
+        else:
+            index = bisect_left(self._sorted_names, prefix)
+        for name in self._sorted_names[index:index + limit]:
+            if not name.startswith(prefix):
+                return
+            phone = self._phones.get(name)
+            if phone is not None:
+                yield PhoneRecord(name=name, phone=phone)
+
+
+class RKSOKInMemoryDatabase(RKSOKDatabase):
+    """
+    In-memory database for RKSOK protocol, records of every user are kept separately.
+    Records live only as long as the server process.
+    """
+
+    def __init__(self) -> None:
+        self._phones: dict[str, dict[str, str]] = {}
+        self._sorted_names: dict[str, list[str]] = {}
+
+    @property
+    def is_connected(self) -> bool:
+        return True
+
+    async def connect(self) -> None:
+        """There is nothing to connect to."""
+
+    async def warm_up_pool(self, min_pool_size: Optional[int] = MONGO_MIN_POOL_SIZE) -> None:
+        """There is no connection pool."""
+
+    async def connect_to_db(
+            self,
+            connection_uri: Optional[str] = MONGO_CONNECTION_URI,
+            db_name: Optional[str] = MONGO_DB_NAME,
+            user_id: Optional[str] = 'user1',
+            ms_timeout: Optional[int] = MONGO_CONNECTION_MS_TIMEOUT
+    ) -> RKSOKInMemoryClient:
+        """Returns client of the user records, creates them for new user. Connection parameters are ignored."""
+        return RKSOKInMemoryClient(
+            phones=self._phones.setdefault(user_id, {}), sorted_names=self._sorted_names.setdefault(user_id, []))
+
+
+def get_database(backend: Optional[str] = DB_BACKEND) -> RKSOKDatabase:
+    """Returns database of the configured backend."""
+    if DBBackend(backend) == DBBackend.MEMORY:
+        return RKSOKInMemoryDatabase()
+    return RKSOKMongoClient()
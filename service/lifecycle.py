@@ -0,0 +1,93 @@
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+from typing import Optional
+
+from config import INHERITED_LISTEN_FD, PREDECESSOR_PID, SHUTDOWN_DRAIN_TIMEOUT, SUCCESSOR_POLL_INTERVAL
+from service.connection_manager import ConnectionManager
+from service.logger import logger
+
+
+def get_inherited_socket() -> Optional[socket.socket]:
+    """Returns listening socket handed off by the predecessor process on hot restart, None for a cold start."""
+    if INHERITED_LISTEN_FD is None:
+        return None
+    return socket.socket(fileno=int(INHERITED_LISTEN_FD))
+
+
+class HotRestarter:
+    """
+    Hot restart: starts new server process which inherits the listening socket file descriptor.
+    Both processes accept connections until the successor warms up and asks this process to drain with SIGTERM,
+    so there is no moment when connections are refused. Only one successor is started at a time;
+    if it exits before taking over, it is reaped and this process keeps serving.
+    """
+
+    def __init__(self, server: asyncio.Server, poll_interval: Optional[float] = SUCCESSOR_POLL_INTERVAL) -> None:
+        self._server = server
+        self._poll_interval = poll_interval
+        self._successor: Optional[subprocess.Popen] = None
+        self._watcher_task: Optional[asyncio.Task] = None
+
+    def restart(self) -> None:
+        """SIGHUP handler, starts successor process unless one is already starting or the server is draining."""
+        if self._successor is not None:
+            logger.warning(f'Hot restart: successor process {self._successor.pid} is already starting, ignoring')
+            return
+        if not self._server.is_serving():
+            logger.warning('Hot restart: the server is draining, ignoring')
+            return
+        if len(self._server.sockets) > 1:
+            logger.warning(f'Server listens {len(self._server.sockets)} sockets, only the first one is handed off')
+        listen_fd = self._server.sockets[0].fileno()
+        self._successor = subprocess.Popen(
+            [sys.executable, *sys.argv],
+            env=os.environ | {'RKSOK_LISTEN_FD': str(listen_fd), 'RKSOK_PREDECESSOR_PID': str(os.getpid())},
+            pass_fds=(listen_fd,),
+        )
+        logger.info(f'Hot restart: started successor process {self._successor.pid}')
+        self._watcher_task = asyncio.create_task(self._watch_successor())
+
+    async def _watch_successor(self) -> None:
+        """Reaps the successor if it exits, which means it failed before taking over."""
+        while (return_code := self._successor.poll()) is None:
+            await asyncio.sleep(self._poll_interval)
+        logger.error(
+            f'Hot restart: successor process {self._successor.pid} exited with code {return_code}, keep serving')
+        self._successor = None
+
+    def stop_watching(self) -> None:
+        """Stops watching the successor, which keeps running after this process exits if it took over."""
+        if self._watcher_task is not None:
+            self._watcher_task.cancel()
+
+
+def notify_predecessor() -> None:
+    """Asks the predecessor process to drain after this process started accepting connections on hot restart."""
+    if PREDECESSOR_PID is None:
+        return
+    try:
+        os.kill(int(PREDECESSOR_PID), signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    logger.info(f'Hot restart: asked predecessor process {PREDECESSOR_PID} to drain')
+
+
+async def drain(
+        servers: list[asyncio.Server],
+        connection_manager: ConnectionManager,
+        timeout: Optional[float] = SHUTDOWN_DRAIN_TIMEOUT,
+) -> None:
+    """
+    Graceful shutdown: stops accepting connections, lets in-flight requests finish for timeout seconds
+    and flushes enqueued log messages.
+    """
+    logger.info(f'Draining {connection_manager.active_connections} connections...')
+    for server in servers:
+        server.close()
+    await connection_manager.wait_closed(timeout=timeout)
+    logger.info('All connections are closed.')
+    await logger.complete()
@@ -0,0 +1,164 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Awaitable, Optional, TypeVar
+
+from config import (
+    PROFILER_SAMPLE_RATE,
+    PROFILER_STACK_SAMPLE_INTERVAL,
+    PROFILER_TOP_STATS_COUNT,
+    PROFILER_TRACEMALLOC_FRAMES,
+    PROFILES_DIR_PATH,
+)
+from models.models import ProfilerMode
+from service.logger import logger
+
+T = TypeVar('T')
+
+
+class _StackSampler(threading.Thread):
+    """Thread which periodically records the current stack of the event loop thread."""
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        super().__init__(name='rksok-stack-sampler', daemon=True)
+        self._thread_id = thread_id
+        self._interval = interval
+        self._stopped = threading.Event()
+        self.stacks: Counter[str] = Counter()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(f'{frame.f_code.co_filename}:{frame.f_code.co_name}')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+
+class RequestProfiler:
+    """
+    Opt-in CPU and memory profiler of request processing.
+    CPU profiling either runs cProfile for one request in sample_rate (ProfilerMode.CPROFILE)
+    or samples the event loop thread stack every PROFILER_STACK_SAMPLE_INTERVAL seconds (ProfilerMode.STACK_SAMPLER).
+    Memory profiling takes tracemalloc snapshots and reports top allocations differences between them.
+    Results are dumped to PROFILES_DIR_PATH. When profiling is off only is_profiling_requests attribute is checked.
+    """
+
+    def __init__(self) -> None:
+        self.mode = ProfilerMode.OFF
+        self.is_profiling_requests = False
+        self._sample_rate = PROFILER_SAMPLE_RATE
+        self._requests_count = 0
+        self._is_request_profiled = False
+        self._stats: Optional[pstats.Stats] = None
+        self._stack_sampler: Optional[_StackSampler] = None
+        self._last_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._dumps_count = 0
+
+    def _get_dump_path(self, name: str) -> str:
+        os.makedirs(PROFILES_DIR_PATH, exist_ok=True)
+        self._dumps_count += 1
+        return f'{PROFILES_DIR_PATH}/{name}-{time.strftime("%Y%m%d-%H%M%S")}-{self._dumps_count}'
+
+    def start(self, mode: ProfilerMode, sample_rate: Optional[int] = PROFILER_SAMPLE_RATE) -> None:
+        """Starts CPU profiling, must be called from the event loop thread."""
+        if self.mode != ProfilerMode.OFF:
+            self.stop()
+        self.mode = mode
+        if mode == ProfilerMode.CPROFILE:
+            self._sample_rate = max(sample_rate, 1)
+            self._requests_count = 0
+            self.is_profiling_requests = True
+        elif mode == ProfilerMode.STACK_SAMPLER:
+            self._stack_sampler = _StackSampler(thread_id=threading.get_ident(), interval=PROFILER_STACK_SAMPLE_INTERVAL)
+            self._stack_sampler.start()
+        logger.info(f'Started {mode.value} profiling')
+
+    def stop(self) -> Optional[str]:
+        """Stops CPU profiling and dumps collected data, returns dump file path."""
+        dump_path = None
+        if self.mode == ProfilerMode.CPROFILE and self._stats is not None:
+            dump_path = self._get_dump_path('cprofile')
+            self._stats.dump_stats(dump_path + '.prof')
+            summary = io.StringIO()
+            self._stats.stream = summary
+            self._stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILER_TOP_STATS_COUNT)
+            with open(dump_path + '.txt', 'w') as summary_file:
+                summary_file.write(summary.getvalue())
+        elif self.mode == ProfilerMode.STACK_SAMPLER:
+            self._stack_sampler.stop()
+            dump_path = self._get_dump_path('stacks')
+            with open(dump_path + '.folded', 'w') as stacks_file:
+                stacks_file.writelines(f'{stack} {count}\n' for stack, count in self._stack_sampler.stacks.items())
+            self._stack_sampler = None
+        logger.info(f'Stopped {self.mode.value} profiling, results: {dump_path}')
+        self.mode = ProfilerMode.OFF
+        self.is_profiling_requests = False
+        self._stats = None
+        return dump_path
+
+    async def profile_request(self, request_processing: Awaitable[T]) -> T:
+        """
+        Awaits request processing, running cProfile for one request in sample_rate.
+        Only one request is profiled at a time, the profile also includes
+        other coroutines which run on the event loop meanwhile.
+        """
+        self._requests_count += 1
+        if self._is_request_profiled or self._requests_count % self._sample_rate:
+            return await request_processing
+
+        self._is_request_profiled = True
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return await request_processing
+        finally:
+            profile.disable()
+            self._is_request_profiled = False
+            if self.is_profiling_requests:
+                if self._stats is None:
+                    self._stats = pstats.Stats(profile)
+                else:
+                    self._stats.add(profile)
+
+    def take_memory_snapshot(self) -> str:
+        """
+        Takes tracemalloc snapshot and dumps top allocations, or top allocations differences
+        with the previous snapshot. The first call starts tracing.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(PROFILER_TRACEMALLOC_FRAMES)
+            self._last_snapshot = None
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(inclusive=False, filename_pattern=tracemalloc.__file__),
+        ))
+        if self._last_snapshot is None:
+            top_stats = snapshot.statistics('lineno')
+        else:
+            top_stats = snapshot.compare_to(self._last_snapshot, 'lineno')
+        self._last_snapshot = snapshot
+
+        dump_path = self._get_dump_path('tracemalloc') + '.txt'
+        with open(dump_path, 'w') as snapshot_file:
+            snapshot_file.writelines(f'{stat}\n' for stat in top_stats[:PROFILER_TOP_STATS_COUNT])
+        logger.info(f'Took memory snapshot, results: {dump_path}')
+        return dump_path
+
+    def stop_memory_tracing(self) -> None:
+        tracemalloc.stop()
+        self._last_snapshot = None
+        logger.info('Stopped memory tracing')
+
+
+REQUEST_PROFILER = RequestProfiler()
@@ -1,4 +1,5 @@
 from dataclasses import astuple
+from typing import AsyncGenerator, AsyncIterator
 
 from config import REQUEST_END
 from service.db import RKSOKDatabaseClient
@@ -10,6 +11,7 @@ from exceptions import (
     UnknownRequestProtocolError,
 )
 from models.models import (
+    PhoneRecord,
     RequestData,
     RKSOKServerCommands,
     RKSOKServerConf,
@@ -18,6 +20,9 @@ from models.models import (
     TaskResult,
 )
 
+# Response is either formatted string or iterator over its parts, which are written to the client as they come
+RKSOKResponse = str | AsyncGenerator[str, None]
+
 
 class RKSOKProtocol:
     """Base class for RKSOK server protocols."""
@@ -63,16 +68,56 @@ class RKSOKProtocol:
         """Abstract method for deleting phone from db."""
         raise NotImplementedError()
 
+    def _search(self) -> AsyncIterator[PhoneRecord]:
+        """Abstract method for iterating over the page of records with names starting with the requested name."""
+        raise NotImplementedError()
+
     def _format_response(self, response_header: str, value: str | None) -> str:
         """Formats proper output."""
         first_row = f'{response_header} {self.configuration.protocol}'
         optional_fields = '\r\n' + value if value else ''
         return first_row + optional_fields + REQUEST_END
 
-    async def process_request(self) -> str:
+    async def _iter_search_response(
+            self,
+            first_record: PhoneRecord,
+            records: AsyncIterator[PhoneRecord],
+    ) -> AsyncGenerator[str, None]:
+        """
+        Yields search response row by row: a name and a phone separated by tab per row.
+        If there are more records than search_page_size, the last row holds the next page marker and the cursor
+        which has to be sent as the request value to get the next page.
+        """
+        yield f'{self.configuration.response_names.ok} {self.configuration.protocol}'
+        record, last_name, records_count = first_record, None, 0
+        try:
+            while record is not None:
+                records_count += 1
+                if records_count > self.configuration.search_page_size:
+                    yield f'\r\n{self.configuration.next_page_marker} {last_name}'
+                    break
+                yield f'\r\n{record.name}\t{record.phone}'
+                last_name = record.name
+                record = await anext(records, None)
+        finally:
+            await records.aclose()
+        yield REQUEST_END
+
+    async def _process_search(self) -> RKSOKResponse:
+        """Fetches the first found record, returns not found response or the iterator over search response."""
+        records = self._search()
+        first_record = await anext(records, None)
+        if first_record is None:
+            return self._format_response(response_header=self.configuration.response_names.not_found, value=None)
+        return self._iter_search_response(first_record=first_record, records=records)
+
+    async def process_request(self) -> RKSOKResponse:
         """Processes client request in form of RequestData, returns corresponding result."""
         if not self._is_checked:
             raise UncheckedRequestError('Run check_request_data() first!')
+        if self._request.command == self.configuration.command_names.search:
+            return await self._process_search()
+
         response = None
         match self._request.command:
             case self.configuration.command_names.get:
@@ -94,7 +139,9 @@ class RKSOKProtocolFirstVersion(RKSOKProtocol):
     configuration = RKSOKServerConf(
         protocol='РКСОК/1.0',
         max_name_length=30,
-        command_names=RKSOKServerCommands(get='ОТДОВАЙ', put='ЗОПИШИ', delete='УДОЛИ'),
+        search_page_size=100,
+        next_page_marker='ЕЩО',
+        command_names=RKSOKServerCommands(get='ОТДОВАЙ', put='ЗОПИШИ', delete='УДОЛИ', search='ПАИЩИ'),
         response_names=RKSOKServerResponses(ok='НОРМАЛДЫКС', not_found='НИНАШОЛ', incorrect='НИПОНЯЛ')
     )
 
@@ -112,3 +159,8 @@ class RKSOKProtocolFirstVersion(RKSOKProtocol):
     async def _delete(self) -> TaskResult:
         """Sends request to db to delete record with specified name."""
         return await self._db_client.delete(name=self._request.name)
+
+    def _search(self) -> AsyncIterator[PhoneRecord]:
+        """Sends request to db to iterate over records with names starting with the requested name."""
+        return self._db_client.search_prefix(
+            prefix=self._request.name, after=self._request.value, limit=self.configuration.search_page_size + 1)
@@ -1,19 +1,27 @@
 import asyncio
 import re
-from typing import Optional, Type
+from contextlib import AsyncExitStack
+from typing import AsyncGenerator, Awaitable, Optional, Type, TypeVar
 
-from config import DB_QUERY_EXEC_TIMEOUT, REQUEST_END
+from config import DB_QUERY_EXEC_TIMEOUT, ENCODING, REQUEST_END
 from exceptions import (
     CanNotParseRequestError,
+    CircuitBreakerOpenError,
     CommandExecTimeoutError,
     RequestCheckBaseException,
+    ResponseStreamError,
+    ServerBaseException,
     UnknownControlServerResponseError,
 )
 from models.models import ControlServerConf, RequestData
+from service.circuit_breaker import MONGO_CIRCUIT_BREAKER
 from service.control_server import get_control_server_response, CONTROL_SERVER_CONF
 from service.db import RKSOKDatabaseClient
 from service.logger import logger
-from service.protocols import RKSOKProtocol, RKSOKProtocolFirstVersion
+from service.protocols import RKSOKProtocol, RKSOKProtocolFirstVersion, RKSOKResponse
+from service.response_cache import ResponseCache
+
+T = TypeVar('T')
 
 
 def _parse_request(request: str) -> RequestData:
@@ -41,15 +49,105 @@ def _parse_request(request: str) -> RequestData:
     return RequestData(command=found_matches[0], name=found_matches[1], protocol=found_matches[2], value=value)
 
 
+def get_unavailable_response(
+        reason: str,
+        rksok_type: Optional[Type[RKSOKProtocol]] = RKSOKProtocolFirstVersion,
+        control_server_conf: Optional[ControlServerConf] = CONTROL_SERVER_CONF,
+) -> str:
+    """
+    Returns fail-fast response for the case when a dependency circuit breaker is open.
+    The request can not be permitted right now, so the response has the control server refusal format.
+    """
+    return f'{control_server_conf.responses.no} {rksok_type.configuration.protocol}\r\n{reason}{REQUEST_END}'
+
+
+async def _wait_until(awaitable: Awaitable[T], deadline: float) -> T:
+    """Awaits with timeout left until deadline in the event loop time."""
+    try:
+        return await asyncio.wait_for(awaitable, timeout=deadline - asyncio.get_running_loop().time())
+    except asyncio.TimeoutError:
+        raise CommandExecTimeoutError(
+            f'Exceeded timeout while reading! Current timeout: {DB_QUERY_EXEC_TIMEOUT} seconds.'
+        )
+
+
+async def _iter_response_stream(
+        response_stream: AsyncGenerator[str, None],
+        deadline: float,
+        breaker_call: AsyncExitStack,
+) -> AsyncGenerator[str, None]:
+    """
+    Yields parts of streamed response, each part is fetched within the time left until the request deadline.
+    The mongo circuit breaker call of the request lasts until the stream ends,
+    database errors in the middle of the stream are raised as ResponseStreamError.
+    """
+    async with breaker_call:
+        try:
+            while (response_part := await _wait_until(anext(response_stream, None), deadline=deadline)) is not None:
+                yield response_part
+        except ServerBaseException:
+            raise
+        except Exception as stream_error:
+            raise ResponseStreamError(f'Response stream was interrupted: {stream_error!r}') from stream_error
+        finally:
+            await response_stream.aclose()
+
+
+async def _process_permitted_request(rksok: RKSOKProtocol) -> RKSOKResponse:
+    """
+    Processes checked and permitted request with timeout under the mongo circuit breaker.
+    Streamed response has to be iterated by the same task, its parts are fetched within the same timeout.
+    """
+    deadline = asyncio.get_running_loop().time() + DB_QUERY_EXEC_TIMEOUT
+    async with AsyncExitStack() as exit_stack:
+        await exit_stack.enter_async_context(MONGO_CIRCUIT_BREAKER)
+        response = await _wait_until(rksok.process_request(), deadline=deadline)
+        if isinstance(response, str):
+            return response
+        return _iter_response_stream(response_stream=response, deadline=deadline, breaker_call=exit_stack.pop_all())
+
+
+async def _process_permitted_request_with_cache(
+        rksok: RKSOKProtocol,
+        request: str,
+        parsed_request: RequestData,
+        response_cache: ResponseCache,
+        namespace: str,
+) -> RKSOKResponse:
+    """
+    Processes permitted request, caches encoded replies to get requests
+    and invalidates cached replies of the name on put and delete requests.
+    Get requests with a value are not cached, the ignored value would only make cache keys unique.
+    """
+    command_names = rksok.configuration.command_names
+    if parsed_request.command == command_names.get and parsed_request.value is None:
+        with response_cache.filling(namespace=namespace, name=parsed_request.name) as pending_fill:
+            response = await _process_permitted_request(rksok=rksok)
+            response_cache.put(
+                pending_fill=pending_fill, request=request, encoded_response=response.encode(encoding=ENCODING))
+        return response
+    if parsed_request.command in (command_names.put, command_names.delete):
+        try:
+            return await _process_permitted_request(rksok=rksok)
+        finally:
+            # the name may be changed even if the request failed by timeout
+            response_cache.invalidate(namespace=namespace, name=parsed_request.name)
+    return await _process_permitted_request(rksok=rksok)
+
+
 async def process_client_request(
         request: str,
         db_client: RKSOKDatabaseClient,
         rksok_type: Optional[Type[RKSOKProtocol]] = RKSOKProtocolFirstVersion,
         control_server_conf: Optional[ControlServerConf] = CONTROL_SERVER_CONF,
-) -> str:
+        response_cache: Optional[ResponseCache] = None,
+        namespace: Optional[str] = None,
+) -> RKSOKResponse:
     """
     Takes raw request and database client, parses request parts and checks their correctness,
     performs interactions with the control server, processes request with timeout and returns response to the client.
+    If the control server or the database circuit breaker is open, returns get_unavailable_response() result.
+    Permitted replies are cached in response_cache under the user namespace if it is specified.
     """
     rksok = rksok_type(db_client=db_client)
     try:
@@ -59,7 +157,12 @@ async def process_client_request(
         logger.error(f'Exception happened: {parsing_error}')
         return f'{rksok.configuration.response_names.incorrect} {rksok.configuration.protocol}{REQUEST_END}'
 
-    control_server_response = await get_control_server_response(request=request, server_conf=control_server_conf)
+    try:
+        control_server_response = await get_control_server_response(request=request, server_conf=control_server_conf)
+    except CircuitBreakerOpenError as breaker_error:
+        logger.error(f'Exception happened: {breaker_error}')
+        return get_unavailable_response(
+            reason=str(breaker_error), rksok_type=rksok_type, control_server_conf=control_server_conf)
     if control_server_response.startswith(control_server_conf.responses.no):
         return control_server_response
     elif not control_server_response.startswith(control_server_conf.responses.yes):
@@ -69,9 +172,16 @@ async def process_client_request(
         )
 
     try:
-        response = await asyncio.wait_for(rksok.process_request(), timeout=DB_QUERY_EXEC_TIMEOUT)
-    except asyncio.TimeoutError:
-        raise CommandExecTimeoutError(
-            f'Exceeded timeout while reading! Current timeout: {DB_QUERY_EXEC_TIMEOUT} seconds.'
+        if response_cache is None:
+            return await _process_permitted_request(rksok=rksok)
+        return await _process_permitted_request_with_cache(
+            rksok=rksok,
+            request=request,
+            parsed_request=parsed_request,
+            response_cache=response_cache,
+            namespace=namespace,
         )
-    return response
+    except CircuitBreakerOpenError as breaker_error:
+        logger.error(f'Exception happened: {breaker_error}')
+        return get_unavailable_response(
+            reason=str(breaker_error), rksok_type=rksok_type, control_server_conf=control_server_conf)
@@ -0,0 +1,117 @@
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from config import ENCODING, RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_TTL
+from models.models import ResponseCacheStats
+
+
+class _CacheEntry:
+    __slots__ = ('name', 'encoded_response', 'size', 'expires_at')
+
+    def __init__(self, name: str, encoded_response: bytes, size: int, expires_at: float) -> None:
+        self.name = name
+        self.encoded_response = encoded_response
+        self.size = size
+        self.expires_at = expires_at
+
+
+class PendingFill:
+    """Responses of the name which are being computed, they are not cached if the name is changed meanwhile."""
+    __slots__ = ('namespace', 'name', 'requests_count', 'is_stale')
+
+    def __init__(self, namespace: str, name: str) -> None:
+        self.namespace = namespace
+        self.name = name
+        self.requests_count = 0
+        self.is_stale = False
+
+
+class ResponseCache:
+    """
+    LRU cache of encoded replies keyed by user namespace and raw request, bounded by max_bytes
+    of encoded requests and replies.
+    Entries of a name are invalidated when the name is changed. The control server permission is a part
+    of the cached reply, so entries expire after ttl seconds to ask the control server again.
+    """
+
+    def __init__(
+            self,
+            max_bytes: Optional[int] = RESPONSE_CACHE_MAX_BYTES,
+            ttl: Optional[float] = RESPONSE_CACHE_TTL,
+    ) -> None:
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._entries: OrderedDict[tuple[str, str], _CacheEntry] = OrderedDict()
+        self._requests_by_name: dict[tuple[str, str], set[str]] = {}
+        self._pending_fills: dict[tuple[str, str], PendingFill] = {}
+        self._total_bytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    def _remove(self, namespace: str, request: str) -> None:
+        entry = self._entries.pop((namespace, request))
+        self._total_bytes -= entry.size
+        name_requests = self._requests_by_name[(namespace, entry.name)]
+        name_requests.discard(request)
+        if not name_requests:
+            del self._requests_by_name[(namespace, entry.name)]
+
+    def get(self, namespace: str, request: str) -> bytes | None:
+        """Returns cached encoded reply to the request or None."""
+        entry = self._entries.get((namespace, request))
+        if entry is None or entry.expires_at < time.monotonic():
+            if entry is not None:
+                self._remove(namespace=namespace, request=request)
+            self._misses += 1
+            return None
+        self._entries.move_to_end((namespace, request))
+        self._hits += 1
+        return entry.encoded_response
+
+    @contextmanager
+    def filling(self, namespace: str, name: str) -> Iterator[PendingFill]:
+        """Marks that reply to the request for the name is being computed until the context exits."""
+        pending_fill = self._pending_fills.get((namespace, name))
+        if pending_fill is None:
+            pending_fill = self._pending_fills[(namespace, name)] = PendingFill(namespace=namespace, name=name)
+        pending_fill.requests_count += 1
+        try:
+            yield pending_fill
+        finally:
+            pending_fill.requests_count -= 1
+            if not pending_fill.requests_count:
+                del self._pending_fills[(namespace, name)]
+
+    def put(self, pending_fill: PendingFill, request: str, encoded_response: bytes) -> None:
+        """Caches encoded reply unless the name was changed while the reply was computed."""
+        size = len(request.encode(encoding=ENCODING)) + len(encoded_response)
+        if pending_fill.is_stale or size > self._max_bytes:
+            return
+        namespace, name = pending_fill.namespace, pending_fill.name
+        if (namespace, request) in self._entries:
+            self._remove(namespace=namespace, request=request)
+        self._entries[(namespace, request)] = _CacheEntry(
+            name=name, encoded_response=encoded_response, size=size, expires_at=time.monotonic() + self._ttl)
+        self._requests_by_name.setdefault((namespace, name), set()).add(request)
+        self._total_bytes += size
+        while self._total_bytes > self._max_bytes:
+            (oldest_namespace, oldest_request), _ = next(iter(self._entries.items()))
+            self._remove(namespace=oldest_namespace, request=oldest_request)
+
+    def invalidate(self, namespace: str, name: str) -> None:
+        """Removes cached replies of the name and prevents caching of replies which are being computed."""
+        for request in list(self._requests_by_name.get((namespace, name), ())):
+            self._remove(namespace=namespace, request=request)
+        pending_fill = self._pending_fills.get((namespace, name))
+        if pending_fill is not None:
+            pending_fill.is_stale = True
+
+    def get_stats(self) -> ResponseCacheStats:
+        return ResponseCacheStats(
+            entries=len(self._entries),
+            total_bytes=self._total_bytes,
+            hits=self._hits,
+            misses=self._misses,
+        )
@@ -0,0 +1,51 @@
+import asyncio
+import socket
+from typing import Optional
+
+from config import (
+    RUNTIME_TUNING,
+    SERVER_LISTEN_BACKLOG,
+    SOCKET_DEFER_ACCEPT_TIMEOUT,
+    SOCKET_RECEIVE_BUFFER_SIZE,
+    SOCKET_SEND_BUFFER_SIZE,
+    USE_UVLOOP,
+)
+from service.logger import logger
+
+# asyncio.start_server default backlog
+_DEFAULT_LISTEN_BACKLOG = 100
+
+
+def install_event_loop_policy(use_uvloop: Optional[bool] = RUNTIME_TUNING and USE_UVLOOP) -> None:
+    """Installs uvloop event loop policy if it is enabled and installed, must be called before asyncio.run()."""
+    if not use_uvloop:
+        return
+    try:
+        import uvloop
+    except ImportError:
+        logger.debug('uvloop is not installed, using default asyncio event loop')
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.debug('Using uvloop event loop')
+
+
+def get_listen_backlog() -> int:
+    return SERVER_LISTEN_BACKLOG if RUNTIME_TUNING else _DEFAULT_LISTEN_BACKLOG
+
+
+def configure_listening_sockets(server: asyncio.Server) -> None:
+    """
+    Sets buffer sizes and TCP_DEFER_ACCEPT on listening sockets. Accepted connections inherit buffer sizes
+    from the listening socket, the receive buffer has to be set before the handshake to affect TCP window scaling.
+    TCP_DEFER_ACCEPT makes connections accepted only when the first request bytes arrive, it exists only on Linux.
+    TCP_NODELAY is not set here, asyncio sets it on every accepted connection.
+    """
+    if not RUNTIME_TUNING:
+        return
+    for listening_socket in server.sockets:
+        if SOCKET_RECEIVE_BUFFER_SIZE is not None:
+            listening_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_RECEIVE_BUFFER_SIZE)
+        if SOCKET_SEND_BUFFER_SIZE is not None:
+            listening_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_SEND_BUFFER_SIZE)
+        if SOCKET_DEFER_ACCEPT_TIMEOUT is not None and hasattr(socket, 'TCP_DEFER_ACCEPT'):
+            listening_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_DEFER_ACCEPT, SOCKET_DEFER_ACCEPT_TIMEOUT)
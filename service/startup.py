@@ -0,0 +1,54 @@
+import time
+from typing import Optional
+
+from pymongo.errors import PyMongoError
+
+from config import MONGO_MIN_POOL_SIZE
+from exceptions import ServerBaseException
+from models.models import ControlServerConf, StartupReport
+from service.control_server import resolve_control_server_address, CONTROL_SERVER_CONF
+from service.db import RKSOKDatabase
+from service.logger import logger
+
+
+async def warm_up(
+        db_client: RKSOKDatabase,
+        control_server_conf: Optional[ControlServerConf] = CONTROL_SERVER_CONF,
+        min_pool_size: Optional[int] = MONGO_MIN_POOL_SIZE,
+) -> StartupReport:
+    """
+    Connects to mongodb, opens min_pool_size pool connections and resolves the control server address
+    before the server starts accepting clients. Failed steps are logged and left to be done lazily by requests.
+    """
+    steps_duration = {}
+    is_warmed_up = True
+    started_at = time.perf_counter()
+
+    step_started_at = time.perf_counter()
+    try:
+        await db_client.connect()
+        steps_duration['mongo connection'] = time.perf_counter() - step_started_at
+
+        step_started_at = time.perf_counter()
+        await db_client.warm_up_pool(min_pool_size=min_pool_size)
+        steps_duration['mongo pool warmup'] = time.perf_counter() - step_started_at
+    except (ServerBaseException, PyMongoError) as db_error:
+        is_warmed_up = False
+        logger.error(f'Exception during mongodb warmup: {db_error}')
+
+    step_started_at = time.perf_counter()
+    try:
+        await resolve_control_server_address(server_conf=control_server_conf)
+        steps_duration['control server resolving'] = time.perf_counter() - step_started_at
+    except OSError as resolve_error:
+        is_warmed_up = False
+        logger.error(f'Exception during resolving control server address: {resolve_error}')
+
+    report = StartupReport(
+        is_warmed_up=is_warmed_up,
+        steps_duration=steps_duration,
+        total_duration=time.perf_counter() - started_at,
+    )
+    steps_info = ', '.join(f'{step}: {duration:.3f} s' for step, duration in report.steps_duration.items())
+    logger.info(f'Warmup finished in {report.total_duration:.3f} s ({steps_info}), {is_warmed_up=}')
+    return report
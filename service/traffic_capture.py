@@ -0,0 +1,58 @@
+import os
+import struct
+from typing import BinaryIO, Iterator
+
+from exceptions import CanNotReadCaptureError
+from models.models import CapturedExchange
+
+# Capture file starts with CAPTURE_MAGIC followed by records. Record header holds timestamp,
+# lengths of client address, request and response; the header is followed by these fields bytes.
+CAPTURE_MAGIC = b'RKSOKCAP\x01'
+_RECORD_HEADER = struct.Struct('>dHII')
+
+
+class TrafficCaptureWriter:
+    """
+    Appends exchanges of the RKSOK server with its clients to the capture file.
+    Every record is appended with a single unbuffered write, so processes which share the file
+    during hot restart do not interleave parts of their records.
+    """
+
+    def __init__(self, path: str) -> None:
+        is_new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file: BinaryIO = open(path, 'ab', buffering=0)
+        if is_new_file:
+            self._file.write(CAPTURE_MAGIC)
+
+    def write(self, exchange: CapturedExchange) -> None:
+        client_address = exchange.client_address.encode()
+        record_header = _RECORD_HEADER.pack(
+            exchange.timestamp, len(client_address), len(exchange.request), len(exchange.response))
+        self._file.write(b''.join((record_header, client_address, exchange.request, exchange.response)))
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _read_exactly(capture_file: BinaryIO, size: int) -> bytes:
+    data = capture_file.read(size)
+    if len(data) != size:
+        raise CanNotReadCaptureError(f'Capture file is truncated! Expected {size} bytes, got {len(data)}')
+    return data
+
+
+def read_capture(path: str) -> Iterator[CapturedExchange]:
+    """Reads exchanges from the capture file one by one."""
+    with open(path, 'rb') as capture_file:
+        if capture_file.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise CanNotReadCaptureError(f'{path} is not an RKSOK capture file!')
+        while record_header := capture_file.read(_RECORD_HEADER.size):
+            if len(record_header) != _RECORD_HEADER.size:
+                raise CanNotReadCaptureError('Capture file is truncated! Incomplete record header')
+            timestamp, address_length, request_length, response_length = _RECORD_HEADER.unpack(record_header)
+            yield CapturedExchange(
+                timestamp=timestamp,
+                client_address=_read_exactly(capture_file, address_length).decode(),
+                request=_read_exactly(capture_file, request_length),
+                response=_read_exactly(capture_file, response_length),
+            )
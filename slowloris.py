@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+from config import ENCODING
+
+SLOW_REQUEST = 'ОТДОВАЙ Иван Иванов РКСОК/1.0\r\n\r\n'
+
+
+async def _hold_connection(host: str, port: int, mode: str, byte_interval: float, duration: float) -> float | None:
+    """
+    Opens connection which sends nothing (silent mode) or one request byte every byte_interval seconds
+    (trickle mode). Returns time until the server closed connection, or None if it survived duration.
+    """
+    try:
+        reader, writer = await asyncio.open_connection(host=host, port=port)
+    except OSError:
+        return 0.0
+    opened_at = time.monotonic()
+    request = SLOW_REQUEST.encode(encoding=ENCODING)
+    sent_bytes = 0
+    try:
+        while time.monotonic() - opened_at < duration:
+            if mode == 'trickle' and sent_bytes < len(request):
+                writer.write(request[sent_bytes:sent_bytes + 1])
+                await writer.drain()
+                sent_bytes += 1
+            try:
+                # server closes evicted connection, so the read returns before timeout
+                await asyncio.wait_for(reader.read(1), timeout=byte_interval)
+                return time.monotonic() - opened_at
+            except asyncio.TimeoutError:
+                pass
+        return None
+    except OSError:
+        return time.monotonic() - opened_at
+    finally:
+        writer.close()
+
+
+async def _probe_request(host: str, port: int) -> float | None:
+    """Sends normal request and returns its latency, None if the server did not respond."""
+    started_at = time.monotonic()
+    try:
+        reader, writer = await asyncio.open_connection(host=host, port=port)
+        writer.write(SLOW_REQUEST.encode(encoding=ENCODING))
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+    except OSError:
+        return None
+    return time.monotonic() - started_at if response else None
+
+
+async def run_attack(host: str, port: int, connections: int, mode: str, byte_interval: float, duration: float) -> None:
+    """Holds slow connections and probes the server with normal requests meanwhile, then prints report."""
+    holders = [
+        asyncio.create_task(_hold_connection(
+            host=host, port=port, mode=mode, byte_interval=byte_interval, duration=duration))
+        for _ in range(connections)
+    ]
+    probe_latencies = []
+    while not all(holder.done() for holder in holders):
+        probe_latencies.append(await _probe_request(host=host, port=port))
+        await asyncio.sleep(1)
+    close_times = [holder.result() for holder in holders]
+
+    evicted = sorted(close_time for close_time in close_times if close_time is not None)
+    print(f'{mode} connections: {connections}, closed by the server: {len(evicted)}, '
+          f'survived {duration} s: {connections - len(evicted)}')
+    if evicted:
+        print(f'Time until closed, s: min {evicted[0]:.1f}, median {statistics.median(evicted):.1f}, '
+              f'max {evicted[-1]:.1f}')
+    answered = [latency for latency in probe_latencies if latency is not None]
+    print(f'Probe requests answered during the attack: {len(answered)} of {len(probe_latencies)}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Simulates slowloris clients to check that the RKSOK server evicts slow connections.')
+    parser.add_argument('host')
+    parser.add_argument('port', type=int)
+    parser.add_argument('--connections', type=int, default=200)
+    parser.add_argument(
+        '--mode', choices=['silent', 'trickle'], default='trickle',
+        help='silent clients send nothing, trickle clients send one request byte every --byte-interval seconds')
+    parser.add_argument('--byte-interval', type=float, default=1.0)
+    parser.add_argument('--duration', type=float, default=30.0, help='max time to hold every connection, seconds')
+    args = parser.parse_args()
+    asyncio.run(run_attack(
+        host=args.host,
+        port=args.port,
+        connections=args.connections,
+        mode=args.mode,
+        byte_interval=args.byte_interval,
+        duration=args.duration,
+    ))
+
+
+if __name__ == '__main__':
+    main()